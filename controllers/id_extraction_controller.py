@@ -2,70 +2,163 @@
 ID Extraction Controller - Orchestrates the ID card extraction workflow.
 """
 
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional
 
 from models.id_card_model import IDCardData, BoundingBox, DetectionResult
-from models.ocr_model import OCRModel
+from models.ocr_model import OCRModel, RapidOCRModel
 from models.detection_model import IDCardDetector, FieldDetector, DigitDetector
+from utils.fast_preproc import bgr_to_gray
 from utils.id_decoder import decode_egyptian_id
-from utils.image_processing import crop_image, annotate_image
+from utils.image_processing import crop_image, annotate_image, expand_boxes_height
+
+
+# Field classes read with OCR: class name -> (IDCardData attribute, whether
+# the field may span several lines and needs EasyOCR paragraph merging)
+TEXT_FIELDS = {
+    'firstName': ('first_name', False),
+    'lastName': ('second_name', False),
+    'serial': ('serial', False),
+    'address': ('address', True),
+}
+
+# Images are downscaled so their longest side is at most this many pixels
+# for ID card detection; the card is still cropped from the original image
+MAX_INPUT_SIDE = 1600
+
+# Cropped cards are downscaled to the field detector's input size before
+# inference; OCR still reads the full-resolution crop
+FIELD_DETECTION_SIDE = 640
+
+# Number of processed uploads kept in the result cache
+RESULT_CACHE_SIZE = 32
 
 
 class IDExtractionController:
     """Controller for Egyptian National ID extraction workflow."""
     
-    def __init__(self):
-        """Initialize the controller with required models."""
-        self.ocr_model = OCRModel(languages=['ar'], gpu=False)
+    def __init__(
+        self, 
+        ocr_backend: str = 'easyocr', 
+        use_digit_detector: bool = True, 
+        ocr_grayscale: bool = False,
+        **ocr_kwargs
+    ):
+        """
+        Initialize the controller with required models.
+        
+        Args:
+            ocr_backend: OCR engine to use ('easyocr' or 'rapidocr')
+            use_digit_detector: Whether to read the National ID with the YOLO
+                digit detector. When False, the digit model is not loaded and
+                the NID region is read by the OCR model with a digit allowlist
+            ocr_grayscale: Whether to feed the text fields to OCR in grayscale.
+                Each ID card is converted once and the field crops are cut from
+                the grayscale card
+            **ocr_kwargs: Extra arguments for the OCR model (e.g. the Arabic
+                rec_model_path/rec_keys_path for RapidOCR)
+        """
+        if ocr_backend == 'easyocr':
+            self.ocr_model = OCRModel(languages=['ar'], **ocr_kwargs)
+        elif ocr_backend == 'rapidocr':
+            self.ocr_model = RapidOCRModel(**ocr_kwargs)
+        else:
+            raise ValueError(f"Unknown OCR backend: {ocr_backend}")
+        
         self.id_card_detector = IDCardDetector()
         self.field_detector = FieldDetector()
-        self.digit_detector = DigitDetector()
+        self.digit_detector = DigitDetector() if use_digit_detector else None
+        self.ocr_grayscale = ocr_grayscale
+        
+        # Results of recently processed uploads, keyed by content hash
+        self._result_cache: OrderedDict = OrderedDict()
+        self._result_cache_lock = threading.Lock()
     
     def extract_from_image(
         self, 
         image: np.ndarray,
-        return_annotated: bool = True
+        return_annotated: bool = False
     ) -> Tuple[IDCardData, Optional[np.ndarray], Optional[np.ndarray]]:
         """
         Extract ID card information from image.
         
         Args:
             image: Input image (BGR format)
-            return_annotated: Whether to return annotated images
+            return_annotated: Whether to draw and return the annotated ID card
             
         Returns:
             Tuple of (IDCardData, cropped_id_card, annotated_id_card)
         """
-        # Step 1: Detect ID card in the image
-        id_card_bbox = self.id_card_detector.detect_first(image)
+        return self.extract_from_images([image], return_annotated)[0]
+    
+    def extract_from_images(
+        self, 
+        images: List[np.ndarray],
+        return_annotated: bool = False
+    ) -> List[Tuple[IDCardData, Optional[np.ndarray], Optional[np.ndarray]]]:
+        """
+        Extract ID card information from several images.
+        
+        Each detector runs once over all images (or all crops) instead of
+        once per image.
+        
+        Args:
+            images: List of input images (BGR format)
+            return_annotated: Whether to draw and return the annotated ID cards
+            
+        Returns:
+            List of (IDCardData, cropped_id_card, annotated_id_card) tuples,
+            in input order
+        """
+        # Step 1: Detect ID cards in all images
+        id_card_bboxes = self.id_card_detector.detect_first_batch(
+            images,
+            max_side=MAX_INPUT_SIDE
+        )
+        
+        # Images without a detected ID card get an empty result
+        outputs = [(IDCardData(), None, None) for _ in images]
+        found = [i for i, bbox in enumerate(id_card_bboxes) if bbox is not None]
         
-        if id_card_bbox is None:
-            # Return error result
-            error_data = IDCardData()
-            return error_data, None, None
+        if not found:
+            return outputs
         
-        # Step 2: Crop the ID card
-        cropped_id_card = crop_image(image, id_card_bbox)
+        # Step 2: Crop the ID cards
+        cropped_id_cards = [crop_image(images[i], id_card_bboxes[i]) for i in found]
         
-        # Step 3: Detect fields in the cropped ID card
-        field_detection = self.field_detector.detect(
-            cropped_id_card, 
-            annotate=return_annotated
+        # Step 3: Detect fields in all cropped ID cards
+        field_detections = self.field_detector.detect_batch(
+            cropped_id_cards,
+            max_side=FIELD_DETECTION_SIDE
         )
         
         # Step 4: Extract information from each field
-        id_data = self._extract_fields(cropped_id_card, field_detection.bounding_boxes)
-        
-        # Step 5: Store detection results
-        id_data.detection_result = field_detection
-        id_data.cropped_id_card = cropped_id_card
+        id_data_list = self._extract_fields_batch(
+            cropped_id_cards,
+            [detection.bounding_boxes for detection in field_detections]
+        )
         
-        # Return data and images
-        annotated_card = field_detection.annotated_image if return_annotated else None
+        for i, cropped_id_card, field_detection, id_data in zip(
+            found, cropped_id_cards, field_detections, id_data_list
+        ):
+            # Step 5: Store detection results
+            id_data.detection_result = field_detection
+            id_data.cropped_id_card = cropped_id_card
+            
+            # Step 6: Draw the detected fields only when the caller needs them
+            annotated_card = None
+            if return_annotated:
+                annotated_card = annotate_image(cropped_id_card, field_detection.bounding_boxes)
+                field_detection.annotated_image = annotated_card
+            
+            outputs[i] = (id_data, cropped_id_card, annotated_card)
         
-        return id_data, cropped_id_card, annotated_card
+        return outputs
     
     def _extract_fields(
         self, 
@@ -82,59 +175,125 @@ class IDExtractionController:
         Returns:
             IDCardData with extracted information
         """
-        id_data = IDCardData()
-        
-        for bbox in bboxes:
-            class_name = bbox.class_name
-            
-            if class_name == 'firstName':
-                id_data.first_name = self.ocr_model.extract_text(
-                    cropped_id_card,
-                    (bbox.x1, bbox.y1, bbox.x2, bbox.y2)
-                )
-            
-            elif class_name == 'lastName':
-                id_data.second_name = self.ocr_model.extract_text(
-                    cropped_id_card,
-                    (bbox.x1, bbox.y1, bbox.x2, bbox.y2)
-                )
-            
-            elif class_name == 'serial':
-                id_data.serial = self.ocr_model.extract_text(
-                    cropped_id_card,
-                    (bbox.x1, bbox.y1, bbox.x2, bbox.y2)
-                )
-            
-            elif class_name == 'address':
-                id_data.address = self.ocr_model.extract_text(
-                    cropped_id_card,
-                    (bbox.x1, bbox.y1, bbox.x2, bbox.y2)
-                )
-            
-            elif class_name == 'nid':
-                # Expand bounding box for better digit detection
-                expanded_bbox = bbox.expand_height(
-                    scale=1.5, 
-                    image_height=cropped_id_card.shape[0]
-                )
+        return self._extract_fields_batch([cropped_id_card], [bboxes])[0]
+    
+    def _extract_fields_batch(
+        self, 
+        cropped_id_cards: List[np.ndarray], 
+        bboxes_list: List[list]
+    ) -> List[IDCardData]:
+        """
+        Extract information from the detected fields of several ID cards.
+        
+        Args:
+            cropped_id_cards: Cropped ID card images
+            bboxes_list: Detected bounding boxes for each ID card
+            
+        Returns:
+            IDCardData with extracted information for each ID card
+        """
+        id_data_list = [IDCardData() for _ in cropped_id_cards]
+        
+        # Collect the crops of all cards so each model runs one batch
+        text_fields = []   # (card_index, attribute, paragraph, crop)
+        nid_cards = []     # card_index of each NID box
+        nid_boxes = []     # (x1, y1, x2, y2)
+        
+        for card_index, (cropped_id_card, bboxes) in enumerate(zip(cropped_id_cards, bboxes_list)):
+            # Convert the whole card once rather than every field crop
+            ocr_card = bgr_to_gray(cropped_id_card) if self.ocr_grayscale else cropped_id_card
+            
+            for bbox in bboxes:
+                field = TEXT_FIELDS.get(bbox.class_name)
                 
-                # Crop the NID region
-                nid_region = crop_image(cropped_id_card, expanded_bbox)
+                if field is not None:
+                    attribute, paragraph = field
+                    text_fields.append((card_index, attribute, paragraph, crop_image(ocr_card, bbox)))
                 
-                # Detect digits
-                id_data.national_id = self.digit_detector.detect_digits(nid_region)
+                elif bbox.class_name == 'nid':
+                    nid_cards.append(card_index)
+                    nid_boxes.append((bbox.x1, bbox.y1, bbox.x2, bbox.y2))
         
-        # Merge names
-        id_data.full_name = f"{id_data.first_name} {id_data.second_name}".strip()
+        # Expand all NID boxes at once for better digit detection, each
+        # clipped to the height of its own card
+        expanded_boxes = expand_boxes_height(
+            nid_boxes,
+            scale=1.5,
+            image_height=np.array([cropped_id_cards[i].shape[0] for i in nid_cards], dtype=np.int32)
+        )
         
-        # Decode National ID if valid
-        if id_data.national_id and len(id_data.national_id) == 14:
-            decoded_info = decode_egyptian_id(id_data.national_id)
-            id_data.birth_date = decoded_info.get('Birth Date', '')
-            id_data.governorate = decoded_info.get('Governorate', '')
-            id_data.gender = decoded_info.get('Gender', '')
+        # Crop the NID regions
+        regions = [
+            cropped_id_cards[card_index][y1:y2, x1:x2]
+            for card_index, (x1, y1, x2, y2) in zip(nid_cards, expanded_boxes.tolist())
+        ]
         
-        return id_data
+        # Run the batched OCR pass in the worker thread while the digits are
+        # detected on this one; both release the GIL during inference
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            ocr_future = executor.submit(
+                self._read_text_fields,
+                [(paragraph, crop) for _, _, paragraph, crop in text_fields]
+            )
+            
+            if self.digit_detector is not None:
+                national_ids = self.digit_detector.detect_digits_batch(regions)
+            else:
+                national_ids = self.ocr_model.extract_digits_batch(regions)
+            
+            texts = ocr_future.result()
+        
+        for card_index, national_id in zip(nid_cards, national_ids):
+            id_data_list[card_index].national_id = national_id
+        
+        for (card_index, attribute, _, _), text in zip(text_fields, texts):
+            setattr(id_data_list[card_index], attribute, text)
+        
+        for id_data in id_data_list:
+            # Merge names
+            id_data.full_name = f"{id_data.first_name} {id_data.second_name}".strip()
+            
+            # Decode National ID if valid
+            if id_data.national_id and len(id_data.national_id) == 14:
+                decoded_info = decode_egyptian_id(id_data.national_id)
+                id_data.birth_date = decoded_info.get('Birth Date', '')
+                id_data.governorate = decoded_info.get('Governorate', '')
+                id_data.gender = decoded_info.get('Gender', '')
+        
+        return id_data_list
+    
+    def _read_text_fields(self, text_fields: list) -> List[str]:
+        """
+        OCR the text field crops.
+        
+        Single-line fields skip EasyOCR's paragraph merging, which is only
+        needed for multi-line fields like the address, so the crops are
+        batched in one group per paragraph mode.
+        
+        Args:
+            text_fields: List of (paragraph, crop) tuples
+            
+        Returns:
+            Extracted text for each field, in input order
+        """
+        texts = [""] * len(text_fields)
+        
+        for paragraph in (False, True):
+            indices = [
+                i for i, (field_paragraph, _) in enumerate(text_fields)
+                if field_paragraph == paragraph
+            ]
+            if not indices:
+                continue
+            
+            group_texts = self.ocr_model.extract_text_batch(
+                [text_fields[i][1] for i in indices],
+                paragraph=paragraph
+            )
+            for i, text in zip(indices, group_texts):
+                texts[i] = text
+        
+        return texts
     
     def process_uploaded_file(
         self, 
@@ -149,51 +308,162 @@ class IDExtractionController:
         Returns:
             Dictionary with extraction results and images
         """
+        return self.process_uploaded_files([uploaded_file])[0]
+    
+    def process_uploaded_files(
+        self, 
+        uploaded_files: list
+    ) -> List[Dict[str, Any]]:
+        """
+        Process several uploaded files from Streamlit in one batch.
+        
+        Args:
+            uploaded_files: List of Streamlit UploadedFile objects
+            
+        Returns:
+            Dictionary with extraction results and images for each file
+        """
+        return self.process_image_bytes([uploaded_file.getvalue() for uploaded_file in uploaded_files])
+    
+    def process_image_bytes(
+        self, 
+        encoded_images: List[bytes]
+    ) -> List[Dict[str, Any]]:
+        """
+        Process several encoded image files (e.g. JPEG or PNG bytes).
+        
+        Each file is decoded once, straight to BGR, and the decoded array is
+        used for the rest of the pipeline. Results are cached by a hash of
+        the file contents, so re-submitting the same image (e.g. on a
+        Streamlit rerun) skips inference.
+        
+        Args:
+            encoded_images: List of encoded image file contents
+            
+        Returns:
+            Dictionary with extraction results and images for each file
+        """
         try:
-            # Read image from uploaded file
-            from PIL import Image
-            image = Image.open(uploaded_file)
-            image_np = np.array(image)
-            
-            # Convert RGB to BGR for OpenCV
-            if len(image_np.shape) == 3 and image_np.shape[2] == 3:
-                image_bgr = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
-            else:
-                image_bgr = image_np
+            results: List[Optional[Dict[str, Any]]] = [None] * len(encoded_images)
+            pending = []   # (index, cache_key, image)
+            
+            for index, file_bytes in enumerate(encoded_images):
+                cache_key = hashlib.blake2b(file_bytes, digest_size=16).digest()
+                
+                cached_result = self._get_cached_result(cache_key)
+                if cached_result is not None:
+                    results[index] = cached_result
+                    continue
+                
+                image_bgr = self._decode_image(file_bytes)
+                if image_bgr is None:
+                    results[index] = self._error_result('Could not read the uploaded file as an image.')
+                    continue
+                
+                pending.append((index, cache_key, image_bgr))
             
-            # Extract information
-            id_data, cropped_card, annotated_card = self.extract_from_image(
-                image_bgr, 
-                return_annotated=True
+            # Extract information from all new images at once; the annotated
+            # cards are drawn directly in display (RGB) format below
+            extractions = self.extract_from_images(
+                [image_bgr for _, _, image_bgr in pending]
             )
             
-            # Check if ID card was detected
-            if cropped_card is None:
-                return {
-                    'success': False,
-                    'error': 'No ID card detected in the image. Please ensure the ID card is clearly visible.',
-                    'data': None,
-                    'cropped_card': None,
-                    'annotated_card': None
-                }
-            
-            # Convert images back to RGB for display
-            cropped_card_rgb = cv2.cvtColor(cropped_card, cv2.COLOR_BGR2RGB)
-            annotated_card_rgb = cv2.cvtColor(annotated_card, cv2.COLOR_BGR2RGB) if annotated_card is not None else None
-            
-            return {
-                'success': True,
-                'error': None,
-                'data': id_data.to_dict(),
-                'cropped_card': cropped_card_rgb,
-                'annotated_card': annotated_card_rgb
-            }
+            for (index, cache_key, _), (id_data, cropped_card, _) in zip(pending, extractions):
+                result = self._build_result(id_data, cropped_card)
+                self._cache_result(cache_key, result)
+                results[index] = result
+            
+            return results
         
         except Exception as e:
-            return {
-                'success': False,
-                'error': f'An error occurred during processing: {str(e)}',
-                'data': None,
-                'cropped_card': None,
-                'annotated_card': None
-            }
+            return [
+                self._error_result(f'An error occurred during processing: {str(e)}')
+                for _ in encoded_images
+            ]
+    
+    def _get_cached_result(self, cache_key: bytes) -> Optional[Dict[str, Any]]:
+        """Look up a processed upload in the result cache."""
+        with self._result_cache_lock:
+            cached_result = self._result_cache.get(cache_key)
+            if cached_result is None:
+                return None
+            
+            self._result_cache.move_to_end(cache_key)
+            # Callers may modify the returned dictionary, not the cache entry
+            return dict(cached_result)
+    
+    def _cache_result(self, cache_key: bytes, result: Dict[str, Any]):
+        """Store a processed upload in the result cache."""
+        with self._result_cache_lock:
+            self._result_cache[cache_key] = result
+            if len(self._result_cache) > RESULT_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
+    
+    @staticmethod
+    def _decode_image(file_bytes: bytes) -> Optional[np.ndarray]:
+        """
+        Decode encoded image bytes to a full-resolution BGR image.
+        
+        Args:
+            file_bytes: Encoded image file contents
+            
+        Returns:
+            BGR image, or None if the bytes are not a readable image
+        """
+        # Decode the uploaded bytes straight to BGR in a single pass
+        data = np.frombuffer(file_bytes, np.uint8)
+        
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+    
+    @staticmethod
+    def _build_result(
+        id_data: IDCardData,
+        cropped_card: Optional[np.ndarray]
+    ) -> Dict[str, Any]:
+        """
+        Build the result dictionary returned to the view.
+        
+        Args:
+            id_data: Extracted ID card data
+            cropped_card: Cropped ID card (BGR), or None if none was detected
+            
+        Returns:
+            Dictionary with extraction results and images
+        """
+        # Check if ID card was detected
+        if cropped_card is None:
+            return IDExtractionController._error_result(
+                'No ID card detected in the image. Please ensure the ID card is clearly visible.'
+            )
+        
+        # Convert the cropped card back to RGB for display. The crop is a view
+        # into the full-resolution upload, so copy it to avoid keeping the whole
+        # upload alive in the result cache
+        cropped_card_rgb = cv2.cvtColor(cropped_card, cv2.COLOR_BGR2RGB)
+        
+        # The RGB conversion needs a new buffer anyway, so draw the boxes
+        # straight into it instead of copying the card a second time
+        annotated_card_rgb = annotate_image(
+            cv2.cvtColor(cropped_card, cv2.COLOR_BGR2RGB),
+            id_data.detection_result.bounding_boxes,
+            inplace=True
+        )
+        
+        return {
+            'success': True,
+            'error': None,
+            'data': id_data.to_dict(),
+            'cropped_card': cropped_card_rgb,
+            'annotated_card': annotated_card_rgb
+        }
+    
+    @staticmethod
+    def _error_result(message: str) -> Dict[str, Any]:
+        """Build a failed result dictionary."""
+        return {
+            'success': False,
+            'error': message,
+            'data': None,
+            'cropped_card': None,
+            'annotated_card': None
+        }
@@ -0,0 +1,71 @@
+"""
+Export the YOLO weights to optimized inference formats.
+
+TensorRT engines (.engine) are the fastest option on NVIDIA GPUs, ONNX
+(.onnx) runs through ONNX Runtime and also speeds up CPU inference.
+Exported files are written next to the .pt weights, where DetectionModel
+picks them up automatically.
+
+Usage:
+    python export_models.py --format engine
+    python export_models.py --format onnx
+"""
+
+import argparse
+import os
+from typing import Optional
+
+from ultralytics import YOLO
+
+from utils.export_settings import EXPORT_BATCH_SIZE
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WEIGHTS = [
+    'detect_id_card.pt',
+    'detect_odjects.pt',
+    'detect_id.pt'
+]
+
+
+def export_models(export_format: str = 'engine', imgsz: Optional[int] = None, half: bool = True):
+    """
+    Export all YOLO weights to the given format.
+    
+    Models are exported with a static input shape: a fixed image size and a
+    batch of EXPORT_BATCH_SIZE images, which lets TensorRT build a single
+    optimized profile. DetectionModel splits larger batches and pads smaller
+    ones to that size.
+    
+    Args:
+        export_format: Ultralytics export format ('engine' or 'onnx')
+        imgsz: Input image size used for export (default: each model's
+            training size, which is also what the .pt weights run at)
+        half: Whether to export with FP16 precision
+    """
+    for weight in WEIGHTS:
+        model_path = os.path.join(BASE_DIR, 'weights', weight)
+        
+        model = YOLO(model_path)
+        model_imgsz = imgsz or model.overrides.get('imgsz', 640)
+        print(f"Exporting {model_path} to {export_format} (imgsz={model_imgsz})...")
+        
+        export_args = {'imgsz': model_imgsz, 'half': half, 'dynamic': False, 'batch': EXPORT_BATCH_SIZE}
+        if export_format == 'engine':
+            # TensorRT engines are built for a specific GPU
+            export_args['device'] = 0
+        
+        exported_path = model.export(format=export_format, **export_args)
+        
+        print(f"Saved {exported_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export YOLO weights for faster inference")
+    parser.add_argument('--format', default='engine', choices=['engine', 'onnx'])
+    parser.add_argument('--imgsz', type=int, default=None, help="Override the export image size")
+    parser.add_argument('--no-half', action='store_true', help="Export in FP32")
+    args = parser.parse_args()
+    
+    export_models(args.format, imgsz=args.imgsz, half=not args.no_half)
@@ -4,7 +4,7 @@ Contains data models and ML model wrappers.
 """
 
 from .id_card_model import IDCardData, BoundingBox, DetectionResult
-from .ocr_model import OCRModel
+from .ocr_model import OCRModel, RapidOCRModel
 from .detection_model import DetectionModel
 
 __all__ = [
@@ -12,5 +12,6 @@ __all__ = [
     'BoundingBox',
     'DetectionResult',
     'OCRModel',
+    'RapidOCRModel',
     'DetectionModel'
 ]
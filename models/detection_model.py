@@ -3,28 +3,151 @@ Detection Model wrapper for YOLO-based object detection.
 """
 
 import os
+import threading
 import cv2
 import numpy as np
+import torch
+from functools import lru_cache
 from ultralytics import YOLO
 from typing import List, Tuple, Optional
 from models.id_card_model import BoundingBox, DetectionResult
+from utils.export_settings import EXPORT_BATCH_SIZE
+from utils.image_processing import annotate_image, resize_to_max_side
+
+
+@lru_cache(maxsize=None)
+def load_yolo(model_path: str, device: str) -> YOLO:
+    """
+    Load YOLO weights once per process and reuse the instance.
+    
+    Args:
+        model_path: Path to YOLO model file (.pt, .onnx or .engine)
+        device: Device the model runs on
+        
+    Returns:
+        Loaded YOLO model
+    """
+    model = YOLO(model_path, task='detect')
+    if model_path.endswith('.pt'):
+        # Exported models are bound to their runtime and can't be moved
+        model.to(device)
+    
+    return model
+
+
+@lru_cache(maxsize=None)
+def yolo_lock(model_path: str, device: str) -> threading.Lock:
+    """
+    Get the lock guarding the shared YOLO instance from load_yolo.
+    
+    Ultralytics predictors keep per-call state and are not thread-safe, and
+    the shared controller serves every Streamlit session, so each YOLO
+    instance runs one prediction at a time.
+    
+    Args:
+        model_path: Path to YOLO model file, as passed to load_yolo
+        device: Device the model runs on
+        
+    Returns:
+        Lock for that model instance
+    """
+    return threading.Lock()
 
 
 class DetectionModel:
     """Wrapper for YOLO detection models."""
     
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, device: Optional[str] = None):
         """
         Initialize detection model.
         
         Args:
             model_path: Path to YOLO model weights
+            device: Device to run inference on (default: 'cuda' when available)
         """
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Model file not found: {model_path}")
         
-        self.model = YOLO(model_path)
+        if device is None:
+            device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        
+        model_path = self._resolve_model_path(model_path, device)
+        is_pytorch = model_path.endswith('.pt')
+        
+        self.model = load_yolo(model_path, device)
+        self._lock = yolo_lock(model_path, device)
         self.model_path = model_path
+        self.device = device
+        # FP16 inference is only supported on CUDA; exported models
+        # carry their own precision
+        self.half = is_pytorch and device.startswith('cuda')
+        # Exported models have a fixed batch size (see export_models.py)
+        self.export_batch = None if is_pytorch else EXPORT_BATCH_SIZE
+    
+    @staticmethod
+    def _resolve_model_path(model_path: str, device: str) -> str:
+        """
+        Prefer an exported TensorRT/ONNX model next to the .pt weights.
+        
+        Args:
+            model_path: Path to YOLO .pt weights
+            device: Device inference will run on
+            
+        Returns:
+            Path to the fastest available model file
+        """
+        base, ext = os.path.splitext(model_path)
+        if ext != '.pt':
+            return model_path
+        
+        candidates = ['.onnx']
+        if device.startswith('cuda'):
+            # TensorRT engines only run on NVIDIA GPUs
+            candidates.insert(0, '.engine')
+        
+        for candidate_ext in candidates:
+            candidate = base + candidate_ext
+            if os.path.exists(candidate):
+                return candidate
+        
+        return model_path
+    
+    def _predict(self, source, conf_threshold: float):
+        """Run the YOLO model on an image or list of images."""
+        # Sources stay host arrays even on CUDA: Ultralytics only letterboxes
+        # NumPy inputs, and tensor sources would have to be stretch-resized to
+        # a stride-aligned (or, for exported models, fixed) shape first. The
+        # images are already downscaled, so the upload per pass is small.
+        with self._lock:
+            if self.export_batch is None:
+                if not isinstance(source, list):
+                    return self.model(source, conf=conf_threshold, device=self.device, half=self.half)
+                
+                return self.model(
+                    source, 
+                    conf=conf_threshold, 
+                    device=self.device, 
+                    half=self.half,
+                    batch=len(source)
+                )
+            
+            # Exported models only accept the batch size they were built for:
+            # split larger batches and pad the last chunk by repeating its
+            # final image, then drop the results of the padding
+            images = source if isinstance(source, list) else [source]
+            results = []
+            for start in range(0, len(images), self.export_batch):
+                chunk = images[start:start + self.export_batch]
+                padded = chunk + [chunk[-1]] * (self.export_batch - len(chunk))
+                results.extend(self.model(
+                    padded, 
+                    conf=conf_threshold, 
+                    device=self.device, 
+                    half=self.half,
+                    batch=self.export_batch
+                )[:len(chunk)])
+            
+            return results
     
     def detect(
         self, 
@@ -43,53 +166,131 @@ class DetectionModel:
         Returns:
             DetectionResult with bounding boxes and optional annotated image
         """
-        results = self.model(image, conf=conf_threshold)
+        results = self._predict(image, conf_threshold)
+        
+        return self._build_result(results[0], image, annotate)
+    
+    def detect_batch(
+        self,
+        images: List[np.ndarray],
+        conf_threshold: float = 0.25,
+        annotate: bool = False,
+        max_side: Optional[int] = None
+    ) -> List[DetectionResult]:
+        """
+        Perform object detection on several images in one forward pass.
+        
+        Args:
+            images: List of input images (BGR format)
+            conf_threshold: Confidence threshold for detections
+            annotate: Whether to create annotated images
+            max_side: Optional size to downscale the longest side of each
+                image to before inference. Boxes are mapped back to the
+                original image coordinates
+            
+        Returns:
+            DetectionResult for each image, in input order
+        """
+        if not images:
+            return []
+        
+        sources, scales = self._downscale(images, max_side)
+        results = self._predict(sources, conf_threshold)
+        
+        return [
+            self._build_result(result, image, annotate, scale)
+            for result, image, scale in zip(results, images, scales)
+        ]
+    
+    @staticmethod
+    def _downscale(
+        images: List[np.ndarray],
+        max_side: Optional[int]
+    ) -> Tuple[List[np.ndarray], List[float]]:
+        """
+        Downscale images for inference, keeping the applied scale factors.
+        
+        Args:
+            images: List of input images
+            max_side: Maximum size of the longest side, or None to keep the
+                images as they are
+            
+        Returns:
+            Tuple of (images to run inference on, scale factor of each image)
+        """
+        if max_side is None:
+            return images, [1.0] * len(images)
+        
+        resized = [resize_to_max_side(image, max_side) for image in images]
+        return [image for image, _ in resized], [scale for _, scale in resized]
+    
+    def _build_result(
+        self,
+        result,
+        image: np.ndarray,
+        annotate: bool,
+        scale: float = 1.0
+    ) -> DetectionResult:
+        """
+        Convert a single YOLO result into a DetectionResult.
+        
+        Args:
+            result: YOLO result for one image
+            image: Image the result belongs to
+            annotate: Whether to create annotated image
+            scale: Factor the image was resized by before inference
+            
+        Returns:
+            DetectionResult with bounding boxes and optional annotated image
+        """
         bounding_boxes = []
-        annotated_image = image.copy() if annotate else None
-        
-        for result in results:
-            for box in result.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                class_id = int(box.cls[0].item())
-                class_name = result.names[class_id]
-                confidence = float(box.conf[0].item())
-                
-                bbox = BoundingBox(
-                    x1=x1, y1=y1, x2=x2, y2=y2,
-                    class_name=class_name,
-                    confidence=confidence
-                )
-                bounding_boxes.append(bbox)
-                
-                # Annotate image if requested
-                if annotate:
-                    # Draw rectangle
-                    cv2.rectangle(annotated_image, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    # Add label
-                    label = f"{class_name}: {confidence:.2f}"
-                    label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)
-                    cv2.rectangle(
-                        annotated_image, 
-                        (x1, y1 - label_size[1] - 10), 
-                        (x1 + label_size[0], y1), 
-                        (0, 255, 0), 
-                        -1
-                    )
-                    cv2.putText(
-                        annotated_image, 
-                        label, 
-                        (x1, y1 - 5), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 
-                        0.5, 
-                        (0, 0, 0), 
-                        2
-                    )
+        
+        xyxy, class_ids, confidences = self._result_arrays(result, scale)
+        
+        # tolist() converts every row to Python numbers in one C-level pass
+        for (x1, y1, x2, y2), class_id, confidence in zip(
+            xyxy.tolist(), class_ids.tolist(), confidences.tolist()
+        ):
+            bbox = BoundingBox(
+                x1=x1, y1=y1, x2=x2, y2=y2,
+                class_name=result.names[class_id],
+                confidence=confidence
+            )
+            bounding_boxes.append(bbox)
+        
+        annotated_image = annotate_image(image, bounding_boxes) if annotate else None
         
         return DetectionResult(
             bounding_boxes=bounding_boxes,
             annotated_image=annotated_image
         )
     
+    @staticmethod
+    def _result_arrays(result, scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Copy all boxes of a YOLO result to NumPy in one transfer each.
+        
+        Reading boxes one by one with .item() forces a device sync per
+        value; this pulls the whole tensors to the host at once.
+        
+        Args:
+            result: YOLO result for one image
+            scale: Factor the image was resized by before inference; boxes
+                are divided by it to get original image coordinates
+            
+        Returns:
+            Tuple of (xyxy as int32 (N, 4), class ids as int32 (N,), confidences (N,))
+        """
+        boxes = result.boxes
+        xyxy = boxes.xyxy.cpu().numpy()
+        if scale != 1.0:
+            xyxy = xyxy / scale
+        xyxy = xyxy.astype(np.int32)
+        class_ids = boxes.cls.cpu().numpy().astype(np.int32)
+        confidences = boxes.conf.cpu().numpy()
+        
+        return xyxy, class_ids, confidences
+    
     def detect_first(
         self, 
         image: np.ndarray,
@@ -105,54 +306,88 @@ class DetectionModel:
         Returns:
             First bounding box or None
         """
-        detection_result = self.detect(image, conf_threshold, annotate=False)
+        results = self._predict(image, conf_threshold)
         
-        if detection_result.bounding_boxes:
-            # Sort by confidence and return highest
-            sorted_boxes = sorted(
-                detection_result.bounding_boxes, 
-                key=lambda x: x.confidence, 
-                reverse=True
-            )
-            return sorted_boxes[0]
+        return self._best_box(results[0])
+    
+    def detect_first_batch(
+        self, 
+        images: List[np.ndarray],
+        conf_threshold: float = 0.25,
+        max_side: Optional[int] = None
+    ) -> List[Optional[BoundingBox]]:
+        """
+        Detect the highest confidence box in each of several images at once.
+        
+        Args:
+            images: List of input images
+            conf_threshold: Confidence threshold
+            max_side: Optional size to downscale the longest side of each
+                image to before inference. Boxes are mapped back to the
+                original image coordinates
+            
+        Returns:
+            First bounding box or None for each image, in input order
+        """
+        if not images:
+            return []
+        
+        sources, scales = self._downscale(images, max_side)
+        results = self._predict(sources, conf_threshold)
+        
+        return [self._best_box(result, scale) for result, scale in zip(results, scales)]
+    
+    def _best_box(self, result, scale: float = 1.0) -> Optional[BoundingBox]:
+        """Build only the highest-confidence box of a YOLO result."""
+        xyxy, class_ids, confidences = self._result_arrays(result, scale)
+        
+        if len(confidences) == 0:
+            return None
+        
+        best = int(np.argmax(confidences))
+        x1, y1, x2, y2 = (int(v) for v in xyxy[best])
         
-        return None
+        return BoundingBox(
+            x1=x1, y1=y1, x2=x2, y2=y2,
+            class_name=result.names[int(class_ids[best])],
+            confidence=float(confidences[best])
+        )
 
 
 class IDCardDetector(DetectionModel):
     """Specialized detector for ID cards."""
     
-    def __init__(self, base_dir: str = None):
+    def __init__(self, base_dir: str = None, device: Optional[str] = None):
         """Initialize ID card detector."""
         if base_dir is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         
         model_path = os.path.join(base_dir, 'weights', 'detect_id_card.pt')
-        super().__init__(model_path)
+        super().__init__(model_path, device=device)
 
 
 class FieldDetector(DetectionModel):
     """Specialized detector for ID card fields."""
     
-    def __init__(self, base_dir: str = None):
+    def __init__(self, base_dir: str = None, device: Optional[str] = None):
         """Initialize field detector."""
         if base_dir is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         
         model_path = os.path.join(base_dir, 'weights', 'detect_odjects.pt')
-        super().__init__(model_path)
+        super().__init__(model_path, device=device)
 
 
 class DigitDetector(DetectionModel):
     """Specialized detector for National ID digits."""
     
-    def __init__(self, base_dir: str = None):
+    def __init__(self, base_dir: str = None, device: Optional[str] = None):
         """Initialize digit detector."""
         if base_dir is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         
         model_path = os.path.join(base_dir, 'weights', 'detect_id.pt')
-        super().__init__(model_path)
+        super().__init__(model_path, device=device)
     
     def detect_digits(self, image: np.ndarray) -> str:
         """
@@ -164,16 +399,33 @@ class DigitDetector(DetectionModel):
         Returns:
             Detected ID number as string
         """
-        detection_result = self.detect(image, annotate=False)
+        results = self._predict(image, conf_threshold=0.25)
         
-        # Sort detections by x-coordinate (left to right)
-        detected_info = [
-            (int(bbox.class_name) if bbox.class_name.isdigit() else bbox.class_name, bbox.x1)
-            for bbox in detection_result.bounding_boxes
-        ]
-        detected_info.sort(key=lambda x: x[1])
+        return self._digits_from_result(results[0])
+    
+    def detect_digits_batch(self, images: List[np.ndarray]) -> List[str]:
+        """
+        Detect and extract digits from several National ID regions at once.
+        
+        Args:
+            images: List of cropped National ID regions
+            
+        Returns:
+            Detected ID number for each region, in input order
+        """
+        if not images:
+            return []
+        
+        results = self._predict(images, conf_threshold=0.25)
+        
+        return [self._digits_from_result(result) for result in results]
+    
+    def _digits_from_result(self, result) -> str:
+        """Concatenate the digit classes of a YOLO result from left to right."""
+        xyxy, class_ids, _ = self._result_arrays(result)
         
-        # Concatenate digits
-        id_number = ''.join([str(cls) for cls, _ in detected_info])
+        # The class names are the digits themselves
+        order = np.argsort(xyxy[:, 0], kind='stable')
+        id_number = ''.join(result.names[int(class_id)] for class_id in class_ids[order])
         
         return id_number
@@ -2,12 +2,17 @@
 Data models for Egyptian National ID card information.
 """
 
+import sys
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 import numpy as np
 
 
-@dataclass
+# Use __slots__ where supported (Python 3.10+) to avoid a per-instance __dict__
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class BoundingBox:
     """Represents a bounding box for detected objects."""
     x1: int
@@ -30,11 +35,15 @@ class BoundingBox:
     
     def expand_height(self, scale: float = 1.2, image_height: int = None) -> 'BoundingBox':
         """Expand bounding box height only."""
-        width = self.x2 - self.x1
         height = self.y2 - self.y1
-        center_x = self.x1 + width // 2
         center_y = self.y1 + height // 2
-        new_height = int(height * scale)
+        
+        if scale == 1.5:
+            # Integer-only equivalent of int(height * 1.5)
+            new_height = height + (height >> 1)
+        else:
+            new_height = int(height * scale)
+        
         new_y1 = max(center_y - new_height // 2, 0)
         new_y2 = center_y + new_height // 2
         
@@ -51,7 +60,7 @@ class BoundingBox:
         )
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class DetectionResult:
     """Represents detection results with bounding boxes."""
     bounding_boxes: List[BoundingBox] = field(default_factory=list)
@@ -65,7 +74,7 @@ class DetectionResult:
         }
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class IDCardData:
     """Represents extracted Egyptian National ID card data."""
     first_name: str = ""
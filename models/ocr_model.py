@@ -5,56 +5,106 @@ OCR Model wrapper for text extraction using EasyOCR.
 import easyocr
 import cv2
 import numpy as np
-from typing import Optional
+import torch
+from typing import List, Optional
+from utils.id_decoder import ARABIC_INDIC_DIGITS, normalize_digits
+
+
+# Characters allowed when reading the National ID number
+DIGIT_ALLOWLIST = '0123456789' + ARABIC_INDIC_DIGITS
+
+# Crops are only batched together when neither side is more than this
+# factor larger than the smallest crop of the batch, so padding stays small
+PAD_SIZE_TOLERANCE = 1.25
+
+
+class _HalfPrecisionModule(torch.nn.Module):
+    """Run a wrapped network under FP16 autocast and return FP32 outputs."""
+    
+    def __init__(self, module: torch.nn.Module):
+        super().__init__()
+        self.module = module
+    
+    def forward(self, *args, **kwargs):
+        with torch.autocast(device_type='cuda', dtype=torch.float16):
+            outputs = self.module(*args, **kwargs)
+        
+        # EasyOCR post-processes outputs with OpenCV/NumPy, which expect FP32
+        if isinstance(outputs, tuple):
+            return tuple(o.float() if torch.is_tensor(o) else o for o in outputs)
+        return outputs.float()
 
 
 class OCRModel:
     """Wrapper for EasyOCR model."""
     
-    def __init__(self, languages: list = None, gpu: bool = False):
+    def __init__(
+        self, 
+        languages: list = None, 
+        gpu: Optional[bool] = None, 
+        warmup: bool = True,
+        quantize: bool = True,
+        half: bool = True
+    ):
         """
         Initialize OCR model.
         
         Args:
             languages: List of language codes (default: ['ar'] for Arabic)
-            gpu: Whether to use GPU acceleration
+            gpu: Whether to use GPU acceleration (default: use CUDA when available)
+            warmup: Whether to run a dummy batched pass so the first real
+                request does not pay the one-off initialization cost
+            quantize: Whether EasyOCR applies dynamic INT8 quantization to its
+                networks (CPU only)
+            half: Whether to run the networks in FP16 (CUDA only)
         """
         if languages is None:
             languages = ['ar']
         
-        self.reader = easyocr.Reader(languages, gpu=gpu)
-    
-    def preprocess_image(self, image: np.ndarray) -> np.ndarray:
-        """
-        Preprocess image for better OCR results.
+        if gpu is None:
+            gpu = torch.cuda.is_available()
         
-        Args:
-            image: Input image (BGR or RGB)
-            
-        Returns:
-            Preprocessed grayscale image
-        """
-        if len(image.shape) == 3:
-            gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray_image = image
+        self.reader = easyocr.Reader(languages, gpu=gpu, quantize=quantize)
+        
+        # EasyOCR silently falls back to CPU when CUDA is unusable, so
+        # callers can check the device it actually uses here
+        self.device = str(self.reader.device)
+        
+        self.half = half and self.device.startswith('cuda')
+        if self.half:
+            # EasyOCR feeds FP32 tensors, so casting the weights with .half()
+            # would break; autocast keeps inputs and outputs in FP32
+            self.reader.detector = _HalfPrecisionModule(self.reader.detector)
+            self.reader.recognizer = _HalfPrecisionModule(self.reader.recognizer)
         
-        return gray_image
+        if warmup:
+            self._warmup()
+    
+    def _warmup(self):
+        """Run a tiny batched OCR pass through detector and recognizer."""
+        dummy = np.full((48, 160), 255, dtype=np.uint8)
+        cv2.putText(dummy, "0123", (10, 35), cv2.FONT_HERSHEY_SIMPLEX, 1, 0, 2)
+        try:
+            self.reader.readtext_batched([dummy], detail=0)
+        except Exception as e:
+            print(f"OCR warmup error: {e}")
     
     def extract_text(
         self, 
         image: np.ndarray, 
         bbox: Optional[tuple] = None,
-        preprocess: bool = True,
         paragraph: bool = True
     ) -> str:
         """
         Extract text from image or image region.
         
+        The crop is passed to EasyOCR without conversion. EasyOCR derives the
+        grayscale image its recognizer needs from a BGR crop itself, and
+        expands a grayscale crop back to three channels for its detector.
+        
         Args:
-            image: Input image
+            image: Input image (BGR or grayscale)
             bbox: Optional bounding box (x1, y1, x2, y2) to crop region
-            preprocess: Whether to preprocess the image
             paragraph: Whether to return text as paragraph
             
         Returns:
@@ -67,16 +117,10 @@ class OCRModel:
         else:
             cropped_image = image
         
-        # Preprocess if requested
-        if preprocess:
-            processed_image = self.preprocess_image(cropped_image)
-        else:
-            processed_image = cropped_image
-        
         # Extract text
         try:
             results = self.reader.readtext(
-                processed_image, 
+                cropped_image, 
                 detail=0, 
                 paragraph=paragraph
             )
@@ -85,3 +129,222 @@ class OCRModel:
         except Exception as e:
             print(f"OCR extraction error: {e}")
             return ""
+    
+    def extract_text_batch(
+        self,
+        images: List[np.ndarray],
+        paragraph: bool = True,
+        batch_size: int = 16,
+        allowlist: Optional[str] = None
+    ) -> List[str]:
+        """
+        Extract text from several image regions in a single batched pass.
+        
+        EasyOCR batches only same-sized inputs. Regions are grouped into
+        buckets of similar size, and each bucket is padded with a white border
+        to its largest region and sent to the reader as one batch. A small
+        name crop is therefore never padded to the size of the address.
+        
+        Args:
+            images: List of image regions
+            paragraph: Whether to return text as paragraph
+            batch_size: Recognizer batch size
+            allowlist: Optional string of the only characters to recognize
+            
+        Returns:
+            Extracted text for each region, in input order
+        """
+        texts = [""] * len(images)
+        
+        # Empty crops would make the whole batch fail
+        indices = [i for i, img in enumerate(images) if img is not None and img.size > 0]
+        if not indices:
+            return texts
+        
+        for bucket in self._size_buckets(images, indices):
+            batch = self._pad_to_common_size([images[i] for i in bucket])
+            
+            try:
+                results = self.reader.readtext_batched(
+                    batch,
+                    batch_size=batch_size,
+                    allowlist=allowlist,
+                    detail=0,
+                    paragraph=paragraph
+                )
+            except Exception as e:
+                print(f"OCR extraction error: {e}")
+                continue
+            
+            for i, result in zip(bucket, results):
+                text = ' '.join(result) if isinstance(result, list) else str(result)
+                texts[i] = text.strip()
+        
+        return texts
+    
+    def extract_digits_batch(self, images: List[np.ndarray]) -> List[str]:
+        """
+        Read National ID numbers from several NID regions with OCR.
+        
+        Args:
+            images: List of cropped National ID regions
+            
+        Returns:
+            Digits (0-9) read from each region, in input order
+        """
+        texts = self.extract_text_batch(images, allowlist=DIGIT_ALLOWLIST)
+        return [normalize_digits(text) for text in texts]
+    
+    @staticmethod
+    def _size_buckets(images: List[np.ndarray], indices: List[int]) -> List[List[int]]:
+        """
+        Group image indices into buckets of similar size.
+        
+        Args:
+            images: List of images
+            indices: Indices of the images to group
+            
+        Returns:
+            List of index buckets; within a bucket, the largest height and
+            width are at most PAD_SIZE_TOLERANCE times the smallest
+        """
+        buckets = []
+        bounds = []   # (min_h, min_w, max_w) of each open bucket
+        
+        for i in sorted(indices, key=lambda i: images[i].shape[:2]):
+            h, w = images[i].shape[:2]
+            
+            # Heights are sorted, so min_h of a bucket is its first height
+            for b, (min_h, min_w, max_w) in enumerate(bounds):
+                new_min_w, new_max_w = min(min_w, w), max(max_w, w)
+                if h <= min_h * PAD_SIZE_TOLERANCE and new_max_w <= new_min_w * PAD_SIZE_TOLERANCE:
+                    buckets[b].append(i)
+                    bounds[b] = (min_h, new_min_w, new_max_w)
+                    break
+            else:
+                buckets.append([i])
+                bounds.append((h, w, w))
+        
+        return buckets
+    
+    @staticmethod
+    def _pad_to_common_size(images: List[np.ndarray]) -> List[np.ndarray]:
+        """Pad images at the bottom/right with white to the largest size."""
+        max_h = max(img.shape[0] for img in images)
+        max_w = max(img.shape[1] for img in images)
+        
+        padded = []
+        for img in images:
+            h, w = img.shape[:2]
+            if h == max_h and w == max_w:
+                padded.append(img)
+            else:
+                padded.append(cv2.copyMakeBorder(
+                    img, 0, max_h - h, 0, max_w - w,
+                    cv2.BORDER_CONSTANT, value=(255, 255, 255)
+                ))
+        
+        return padded
+
+
+class RapidOCRModel:
+    """
+    Wrapper for RapidOCR (ONNX Runtime), with the same interface as OCRModel.
+    
+    RapidOCR runs its detector and recognizer as ONNX graphs, so it does not
+    need PyTorch at inference time and starts up faster. Its bundled models
+    are Chinese/English; pass an Arabic recognition model and its keys file
+    for Egyptian ID cards.
+    """
+    
+    def __init__(
+        self, 
+        rec_model_path: Optional[str] = None, 
+        rec_keys_path: Optional[str] = None
+    ):
+        """
+        Initialize OCR model.
+        
+        Args:
+            rec_model_path: Path to an ONNX recognition model (e.g. Arabic)
+            rec_keys_path: Path to the character dictionary of that model
+        """
+        try:
+            from rapidocr_onnxruntime import RapidOCR
+        except ImportError as e:
+            raise ImportError(
+                "RapidOCR backend requires 'rapidocr_onnxruntime' "
+                "(pip install rapidocr_onnxruntime)"
+            ) from e
+        
+        kwargs = {}
+        if rec_model_path is not None:
+            kwargs['rec_model_path'] = rec_model_path
+        if rec_keys_path is not None:
+            kwargs['rec_keys_path'] = rec_keys_path
+        
+        self.engine = RapidOCR(**kwargs)
+        self.device = 'cpu'
+    
+    def extract_text(
+        self, 
+        image: np.ndarray, 
+        bbox: Optional[tuple] = None,
+        paragraph: bool = True
+    ) -> str:
+        """
+        Extract text from image or image region.
+        
+        Args:
+            image: Input image
+            bbox: Optional bounding box (x1, y1, x2, y2) to crop region
+            paragraph: Unused; RapidOCR lines are always joined in reading order
+            
+        Returns:
+            Extracted text
+        """
+        if bbox is not None:
+            x1, y1, x2, y2 = bbox
+            image = image[y1:y2, x1:x2]
+        
+        try:
+            results, _ = self.engine(np.ascontiguousarray(image))
+            text = ' '.join(line[1] for line in (results or []))
+            return text.strip()
+        except Exception as e:
+            print(f"OCR extraction error: {e}")
+            return ""
+    
+    def extract_text_batch(
+        self,
+        images: List[np.ndarray],
+        paragraph: bool = True,
+        batch_size: int = 16
+    ) -> List[str]:
+        """
+        Extract text from several image regions.
+        
+        Args:
+            images: List of image regions
+            paragraph: Unused; kept for interface compatibility with OCRModel
+            batch_size: Unused; RapidOCR processes one image per call
+            
+        Returns:
+            Extracted text for each region, in input order
+        """
+        return [
+            self.extract_text(img) if img is not None and img.size > 0 else ""
+            for img in images
+        ]
+    
+    def extract_digits_batch(self, images: List[np.ndarray]) -> List[str]:
+        """
+        Read National ID numbers from several NID regions with OCR.
+        
+        Args:
+            images: List of cropped National ID regions
+            
+        Returns:
+            Digits (0-9) read from each region, in input order
+        """
+        return [normalize_digits(text) for text in self.extract_text_batch(images)]
@@ -86,6 +86,62 @@ def test_data_models():
         return False
 
 
+def test_bbox_expand_height():
+    """Test bounding box height expansion."""
+    print("\nTesting bounding box expansion...")
+    
+    try:
+        from models.id_card_model import BoundingBox
+        
+        bbox = BoundingBox(x1=10, y1=40, x2=100, y2=61, class_name="nid", confidence=0.9)
+        expanded = bbox.expand_height(scale=1.5, image_height=100)
+        assert (expanded.y1, expanded.y2) == (35, 65)
+        assert (bbox.y1, bbox.y2) == (40, 61)
+        print("[PASS] expand_height returns a new expanded box")
+        
+        # The integer fast path for 1.5 must match the float computation
+        for scale in (1.2, 1.5, 2.0):
+            for height in range(0, 200):
+                expanded = BoundingBox(x1=0, y1=50, x2=10, y2=50 + height).expand_height(scale=scale)
+                center_y = 50 + height // 2
+                new_half = int(height * scale) // 2
+                assert (expanded.y1, expanded.y2) == (max(center_y - new_half, 0), center_y + new_half)
+        print("[PASS] expand_height matches int(height * scale)")
+        
+        return True
+    except Exception as e:
+        print(f"[FAIL] Bounding box expansion test failed: {e}")
+        return False
+
+
+def test_expand_boxes_height():
+    """Test vectorized bounding box height expansion."""
+    print("\nTesting batch box expansion...")
+    
+    try:
+        from models.id_card_model import BoundingBox
+        import numpy as np
+        from utils.image_processing import expand_boxes_height
+        
+        boxes = [(10, 40, 100, 61), (0, 0, 50, 7), (5, 20, 90, 33)]
+        for scale in (1.2, 1.5, 2.0):
+            expanded = expand_boxes_height(boxes, scale=scale, image_height=62)
+            for row, box in zip(expanded, boxes):
+                bbox = BoundingBox(*box).expand_height(scale=scale, image_height=62)
+                assert tuple(int(v) for v in row) == (bbox.x1, bbox.y1, bbox.x2, bbox.y2)
+        print("[PASS] expand_boxes_height matches expand_height")
+        
+        # Boxes from different cards are clipped to their own card height
+        expanded = expand_boxes_height([(0, 50, 10, 60), (0, 50, 10, 60)], scale=1.5, image_height=np.array([58, 100]))
+        assert expanded[:, 3].tolist() == [58, 62]
+        print("[PASS] expand_boxes_height clips to per-box image heights")
+        
+        return True
+    except Exception as e:
+        print(f"[FAIL] Batch box expansion test failed: {e}")
+        return False
+
+
 def test_id_decoder():
     """Test Egyptian ID decoder."""
     print("\nTesting ID decoder...")
@@ -114,6 +170,46 @@ def test_id_decoder():
         return False
 
 
+def test_normalize_digits():
+    """Test National ID digit normalization."""
+    print("\nTesting digit normalization...")
+    
+    try:
+        from utils.id_decoder import normalize_digits
+        
+        assert normalize_digits("٢٩٥٠١٠١ 1234567") == "29501011234567"
+        assert normalize_digits("") == ""
+        print("[PASS] Arabic-Indic digits are normalized")
+        
+        return True
+    except Exception as e:
+        print(f"[FAIL] Digit normalization test failed: {e}")
+        return False
+
+
+def test_id_decoder_batch():
+    """Test batched National ID decoding."""
+    print("\nTesting batch ID decoder...")
+    
+    try:
+        from utils.id_decoder import decode_egyptian_id, decode_egyptian_id_batch
+        
+        ids = ["29501011234567", "30012310100012", "49501011234567", "123", "", "2950101123456x"]
+        assert decode_egyptian_id_batch(ids) == [decode_egyptian_id(i) for i in ids]
+        assert decode_egyptian_id_batch([]) == []
+        print("[PASS] Batch decoding matches single-ID decoding")
+        
+        mixed = ["٢٩٥٠١٠١١٢٣٤٥٦٧", "29501011234567", "٣٠٠١٢٣1٠1٠٠٠12", "２９５０１０１１２３４５６７"]
+        assert decode_egyptian_id_batch(mixed) == [decode_egyptian_id(i) for i in mixed]
+        assert decode_egyptian_id_batch(mixed)[0] == decode_egyptian_id_batch(mixed)[1]
+        print("[PASS] Batch decoding matches single-ID decoding on Arabic-Indic digits")
+        
+        return True
+    except Exception as e:
+        print(f"[FAIL] Batch ID decoder test failed: {e}")
+        return False
+
+
 def main():
     """Run all tests."""
     print("=" * 60)
@@ -123,7 +219,11 @@ def main():
     tests = [
         ("Import Test", test_imports),
         ("Data Models Test", test_data_models),
+        ("Bounding Box Test", test_bbox_expand_height),
+        ("Batch Box Expansion Test", test_expand_boxes_height),
         ("ID Decoder Test", test_id_decoder),
+        ("Digit Normalization Test", test_normalize_digits),
+        ("Batch ID Decoder Test", test_id_decoder_batch),
     ]
     
     results = []
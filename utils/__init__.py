@@ -3,11 +3,15 @@ Utilities package for Egyptian National ID OCR.
 Contains helper functions for image processing and ID decoding.
 """
 
-from .image_processing import annotate_image, crop_image
-from .id_decoder import decode_egyptian_id
+from .image_processing import annotate_image, crop_image, expand_boxes_height, resize_to_max_side
+from .id_decoder import decode_egyptian_id, decode_egyptian_id_batch, normalize_digits
 
 __all__ = [
     'annotate_image',
     'crop_image',
-    'decode_egyptian_id'
+    'expand_boxes_height',
+    'resize_to_max_side',
+    'decode_egyptian_id',
+    'decode_egyptian_id_batch',
+    'normalize_digits'
 ]
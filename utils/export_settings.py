@@ -0,0 +1,12 @@
+"""
+Settings shared by export_models.py and the detection model wrappers.
+
+Kept free of torch/ultralytics imports so the export script and the
+wrappers can agree on the exported input shape without loading the models.
+"""
+
+# Batch size exported models are built for. Exports use a fixed input shape,
+# so DetectionModel splits larger batches and pads smaller ones to this size.
+# Uploads are processed a few cards at a time, so a small batch keeps the
+# padding overhead of single-image calls low.
+EXPORT_BATCH_SIZE = 4
@@ -2,7 +2,74 @@
 Egyptian National ID decoder utilities.
 """
 
-from typing import Dict
+from typing import Dict, List
+
+import numpy as np
+
+
+# Egyptian ID cards print the National ID with Arabic-Indic digits
+ARABIC_INDIC_DIGITS = '٠١٢٣٤٥٦٧٨٩'
+_TO_WESTERN_DIGITS = str.maketrans(ARABIC_INDIC_DIGITS, '0123456789')
+
+# Governorate names by the two-digit code at positions 8-9
+_GOVERNORATES = {
+    '01': 'Cairo',
+    '02': 'Alexandria',
+    '03': 'Port Said',
+    '04': 'Suez',
+    '11': 'Damietta',
+    '12': 'Dakahlia',
+    '13': 'Ash Sharqia',
+    '14': 'Kaliobeya',
+    '15': 'Kafr El - Sheikh',
+    '16': 'Gharbia',
+    '17': 'Monoufia',
+    '18': 'El Beheira',
+    '19': 'Ismailia',
+    '21': 'Giza',
+    '22': 'Beni Suef',
+    '23': 'Fayoum',
+    '24': 'El Menia',
+    '25': 'Assiut',
+    '26': 'Sohag',
+    '27': 'Qena',
+    '28': 'Aswan',
+    '29': 'Luxor',
+    '31': 'Red Sea',
+    '32': 'New Valley',
+    '33': 'Matrouh',
+    '34': 'North Sinai',
+    '35': 'South Sinai',
+    '88': 'Foreign'
+}
+
+# Base year by century digit
+_CENTURY = {2: 1900, 3: 2000}
+
+# Result for IDs that cannot be decoded; callers get a copy
+_EMPTY = {'Birth Date': '', 'Governorate': '', 'Gender': ''}
+
+# Lookup tables for batch decoding, indexed by numeric codes
+_GOVERNORATE_TABLE = np.full(100, 'Unknown', dtype=object)
+for _code, _name in _GOVERNORATES.items():
+    _GOVERNORATE_TABLE[int(_code)] = _name
+
+_YEAR_TABLE = np.array([f"{year:04d}" for year in range(1900, 2100)], dtype=object)
+_MONTH_DAY_TABLE = np.array([f"-{code // 100:02d}-{code % 100:02d}" for code in range(10000)], dtype=object)
+_GENDER_TABLE = np.array(["Female", "Male"], dtype=object)
+
+
+def normalize_digits(text: str) -> str:
+    """
+    Convert Arabic-Indic digits to Western digits and drop everything else.
+    
+    Args:
+        text: Text read from the National ID region
+        
+    Returns:
+        String containing only the digits 0-9
+    """
+    return ''.join(ch for ch in text.translate(_TO_WESTERN_DIGITS) if '0' <= ch <= '9')
 
 
 def decode_egyptian_id(id_number: str) -> Dict[str, str]:
@@ -20,86 +87,107 @@ def decode_egyptian_id(id_number: str) -> Dict[str, str]:
     - Digit 14: Check digit
     
     Args:
-        id_number: 14-digit National ID number
+        id_number: 14-digit National ID number (Western or Arabic-Indic digits)
         
     Returns:
         Dictionary with birth_date, governorate, and gender
     """
-    governorates = {
-        '01': 'Cairo',
-        '02': 'Alexandria',
-        '03': 'Port Said',
-        '04': 'Suez',
-        '11': 'Damietta',
-        '12': 'Dakahlia',
-        '13': 'Ash Sharqia',
-        '14': 'Kaliobeya',
-        '15': 'Kafr El - Sheikh',
-        '16': 'Gharbia',
-        '17': 'Monoufia',
-        '18': 'El Beheira',
-        '19': 'Ismailia',
-        '21': 'Giza',
-        '22': 'Beni Suef',
-        '23': 'Fayoum',
-        '24': 'El Menia',
-        '25': 'Assiut',
-        '26': 'Sohag',
-        '27': 'Qena',
-        '28': 'Aswan',
-        '29': 'Luxor',
-        '31': 'Red Sea',
-        '32': 'New Valley',
-        '33': 'Matrouh',
-        '34': 'North Sinai',
-        '35': 'South Sinai',
-        '88': 'Foreign'
+    if not id_number:
+        return dict(_EMPTY)
+    
+    # Validate ID length and characters before any int() conversion; only
+    # ASCII digits pass, so other Unicode digits cannot reach the lookups
+    id_number = id_number.translate(_TO_WESTERN_DIGITS)
+    if len(id_number) != 14 or not (id_number.isascii() and id_number.isdigit()):
+        return dict(_EMPTY)
+    
+    # Determine century
+    century_digit = int(id_number[0])
+    base_year = _CENTURY.get(century_digit)
+    if base_year is None:
+        print(f"Error decoding ID {id_number}: Invalid century digit: {century_digit}")
+        return dict(_EMPTY)
+    
+    # Extract components
+    full_year = base_year + int(id_number[1:3])
+    month = int(id_number[3:5])
+    day = int(id_number[5:7])
+    governorate_code = id_number[7:9]
+    gender_code = int(id_number[12:13])
+    
+    # Determine gender
+    gender = "Male" if gender_code % 2 != 0 else "Female"
+    
+    # Get governorate
+    governorate = _GOVERNORATES.get(governorate_code, "Unknown")
+    
+    # Format birth date
+    birth_date = f"{full_year:04d}-{month:02d}-{day:02d}"
+    
+    return {
+        'Birth Date': birth_date,
+        'Governorate': governorate,
+        'Gender': gender
     }
+
+
+def decode_egyptian_id_batch(id_numbers: List[str]) -> List[Dict[str, str]]:
+    """
+    Decode many Egyptian National ID numbers at once.
     
-    # Validate ID length
-    if not id_number or len(id_number) != 14:
-        return {
-            'Birth Date': '',
-            'Governorate': '',
-            'Gender': ''
-        }
+    Valid IDs are decoded column-wise on a (N, 14) digit array instead of
+    one character at a time, and the output strings come from precomputed
+    tables. Results match decode_egyptian_id for each ID.
     
-    try:
-        # Extract components
-        century_digit = int(id_number[0])
-        year = int(id_number[1:3])
-        month = int(id_number[3:5])
-        day = int(id_number[5:7])
-        governorate_code = id_number[7:9]
-        gender_code = int(id_number[12:13])
-        
-        # Determine century and full year
-        if century_digit == 2:
-            full_year = 1900 + year
-        elif century_digit == 3:
-            full_year = 2000 + year
-        else:
-            raise ValueError(f"Invalid century digit: {century_digit}")
-        
-        # Determine gender
-        gender = "Male" if gender_code % 2 != 0 else "Female"
-        
-        # Get governorate
-        governorate = governorates.get(governorate_code, "Unknown")
-        
-        # Format birth date
-        birth_date = f"{full_year:04d}-{month:02d}-{day:02d}"
+    Args:
+        id_numbers: List of 14-digit National ID numbers
         
-        return {
+    Returns:
+        List of dictionaries with birth_date, governorate, and gender
+    """
+    results = [dict(_EMPTY) for _ in id_numbers]
+    
+    # Step 1: Keep only 14-digit strings, with Arabic-Indic digits normalized
+    normalized = [id_number or '' for id_number in id_numbers]
+    normalized = [
+        id_number if id_number.isascii() else id_number.translate(_TO_WESTERN_DIGITS)
+        for id_number in normalized
+    ]
+    valid = [
+        i for i, id_number in enumerate(normalized)
+        if len(id_number) == 14 and id_number.isascii() and id_number.isdigit()
+    ]
+    if not valid:
+        return results
+    
+    # Step 2: One row of digit values per ID
+    joined = ''.join(normalized[i] for i in valid).encode('ascii')
+    digits = (np.frombuffer(joined, dtype=np.uint8).reshape(-1, 14) - ord('0')).astype(np.int32)
+    
+    # Step 3: IDs with an invalid century stay empty
+    century = digits[:, 0]
+    known_century = (century == 2) | (century == 3)
+    for row in np.flatnonzero(~known_century).tolist():
+        print(f"Error decoding ID {normalized[valid[row]]}: Invalid century digit: {century[row]}")
+    
+    indices = np.asarray(valid)[known_century].tolist()
+    digits = digits[known_century]
+    
+    # Step 4: Build every output column with NumPy table lookups
+    year_offset = np.where(digits[:, 0] == 2, 0, 100) + digits[:, 1] * 10 + digits[:, 2]
+    month_day = digits[:, 3] * 1000 + digits[:, 4] * 100 + digits[:, 5] * 10 + digits[:, 6]
+    birth_dates = _YEAR_TABLE[year_offset] + _MONTH_DAY_TABLE[month_day]
+    governorates = _GOVERNORATE_TABLE[digits[:, 7] * 10 + digits[:, 8]]
+    genders = _GENDER_TABLE[digits[:, 12] & 1]
+    
+    # Step 5: Zip the columns into one result per ID
+    for index, birth_date, governorate, gender in zip(
+        indices, birth_dates.tolist(), governorates.tolist(), genders.tolist()
+    ):
+        results[index] = {
             'Birth Date': birth_date,
             'Governorate': governorate,
             'Gender': gender
         }
     
-    except (ValueError, IndexError) as e:
-        print(f"Error decoding ID {id_number}: {e}")
-        return {
-            'Birth Date': '',
-            'Governorate': '',
-            'Gender': ''
-        }
+    return results
@@ -4,11 +4,21 @@ Image processing utilities.
 
 import cv2
 import numpy as np
-from typing import List, Tuple
-from models.id_card_model import BoundingBox
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 
+if TYPE_CHECKING:
+    # Type hints only: the models package imports these helpers
+    from models.id_card_model import BoundingBox
 
-def crop_image(image: np.ndarray, bbox: BoundingBox) -> np.ndarray:
+
+@lru_cache(maxsize=256)
+def _text_size(label: str) -> Tuple[int, int]:
+    """Cached size of a label drawn with the annotation font."""
+    return cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
+
+
+def crop_image(image: np.ndarray, bbox: 'BoundingBox') -> np.ndarray:
     """
     Crop image using bounding box.
     
@@ -22,12 +32,69 @@ def crop_image(image: np.ndarray, bbox: BoundingBox) -> np.ndarray:
     return image[bbox.y1:bbox.y2, bbox.x1:bbox.x2]
 
 
+def expand_boxes_height(
+    boxes: np.ndarray,
+    scale: float = 1.2,
+    image_height: Optional[Union[int, np.ndarray]] = None
+) -> np.ndarray:
+    """
+    Expand the height of many boxes at once, like BoundingBox.expand_height.
+    
+    Args:
+        boxes: Array of (x1, y1, x2, y2) rows, shape (N, 4)
+        scale: Height scale factor
+        image_height: Optional height to clip y2 to, either one value or one
+            per box
+        
+    Returns:
+        New int32 array of shape (N, 4) with expanded boxes
+    """
+    expanded = np.array(boxes, dtype=np.int32).reshape(-1, 4)
+    y1, y2 = expanded[:, 1], expanded[:, 3]
+    
+    height = y2 - y1
+    center_y = y1 + height // 2
+    half_height = (height * scale).astype(np.int32) // 2
+    
+    new_y1 = np.maximum(center_y - half_height, 0)
+    new_y2 = center_y + half_height
+    if image_height is not None:
+        new_y2 = np.minimum(new_y2, image_height)
+    
+    expanded[:, 1] = new_y1
+    expanded[:, 3] = new_y2
+    
+    return expanded
+
+
+def resize_to_max_side(image: np.ndarray, max_side: int) -> Tuple[np.ndarray, float]:
+    """
+    Downscale image so its longest side is at most max_side.
+    
+    Args:
+        image: Input image
+        max_side: Maximum allowed size of the longest side
+        
+    Returns:
+        Tuple of (resized image, applied scale factor)
+    """
+    h, w = image.shape[:2]
+    scale = min(1.0, max_side / max(h, w))
+    
+    if scale == 1.0:
+        return image, scale
+    
+    resized = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return resized, scale
+
+
 def annotate_image(
     image: np.ndarray, 
-    bboxes: List[BoundingBox],
+    bboxes: List['BoundingBox'],
     color: Tuple[int, int, int] = (0, 255, 0),
     thickness: int = 2,
-    show_labels: bool = True
+    show_labels: bool = True,
+    inplace: bool = False
 ) -> np.ndarray:
     """
     Annotate image with bounding boxes and labels.
@@ -38,11 +105,14 @@ def annotate_image(
         color: Color for boxes (BGR format)
         thickness: Line thickness
         show_labels: Whether to show labels
+        inplace: Draw directly on the given image instead of a copy. Use it
+            when the caller owns the buffer and does not need the original;
+            the image must be a contiguous array
         
     Returns:
         Annotated image
     """
-    annotated = image.copy()
+    annotated = image if inplace else image.copy()
     
     for bbox in bboxes:
         # Draw rectangle
@@ -61,12 +131,7 @@ def annotate_image(
                 label += f": {bbox.confidence:.2f}"
             
             # Calculate label size
-            label_size, _ = cv2.getTextSize(
-                label, 
-                cv2.FONT_HERSHEY_SIMPLEX, 
-                0.5, 
-                2
-            )
+            label_size = _text_size(label)
             
             # Draw label background
             cv2.rectangle(
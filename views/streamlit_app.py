@@ -2,8 +2,38 @@
 Enhanced Streamlit UI for Egyptian National ID Extractor.
 """
 
+import threading
+from typing import Optional
+
 import streamlit as st
-from controllers.id_extraction_controller import IDExtractionController
+
+
+_warmup_thread: Optional[threading.Thread] = None
+
+
+@st.cache_resource(show_spinner=False)
+def load_controller():
+    """
+    Get the shared controller, loading the models if needed.
+    
+    Streamlit keeps the cached controller across reruns and sessions, even
+    when it reloads this module after a source change. The controller module
+    is imported here rather than at the top of the file because importing it
+    pulls in PyTorch, YOLO and EasyOCR.
+    """
+    from controllers.id_extraction_controller import IDExtractionController
+    return IDExtractionController()
+
+
+def start_model_warmup():
+    """Load the models in a background thread so the UI renders immediately."""
+    global _warmup_thread
+    
+    if _warmup_thread is None:
+        # Fills the same resource cache that later load_controller calls
+        # read; callers arriving during warmup wait for it to finish
+        _warmup_thread = threading.Thread(target=load_controller, daemon=True)
+        _warmup_thread.start()
 
 
 def apply_custom_css():
@@ -186,8 +216,56 @@ def render_extracted_data(data: dict):
         st.json(data)
 
 
+def render_result(result: dict, index: int = 0):
+    """Render the extraction result for one uploaded image."""
+    if not result['success']:
+        st.error(f"❌ {result['error']}")
+        return
+    
+    st.success("✅ Data Extracted Successfully!")
+    
+    # Create two columns for images
+    st.markdown("### 🖼️ Processed Images")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("**Cropped ID Card**")
+        if result['cropped_card'] is not None:
+            st.image(
+                result['cropped_card'],
+                caption='Detected and Cropped ID Card',
+                use_container_width=True
+            )
+    
+    with col2:
+        st.markdown("**Detected Fields**")
+        if result['annotated_card'] is not None:
+            st.image(
+                result['annotated_card'],
+                caption='ID Card with Detected Bounding Boxes',
+                use_container_width=True
+            )
+    
+    # Display extracted data
+    st.markdown("---")
+    render_extracted_data(result['data'])
+    
+    # Download button for JSON
+    st.markdown("---")
+    st.download_button(
+        label="📥 Download Extracted Data (JSON)",
+        data=str(result['data']),
+        file_name="extracted_id_data.json",
+        mime="application/json",
+        key=f"download_{index}"
+    )
+
+
 def run_app():
     """Main application function."""
+    # Start loading models while the page renders
+    start_model_warmup()
+    
     # Page configuration
     st.set_page_config(
         page_title="Egyptian ID Extractor",
@@ -207,7 +285,7 @@ def run_app():
         <div style="background: #e3f2fd; padding: 1rem; border-radius: 5px; margin-bottom: 2rem; color: #2c3e50;">
             <strong>📌 Instructions:</strong>
             <ol style="margin: 0.5rem 0 0 1rem;">
-                <li>Upload a clear image of an Egyptian National ID card</li>
+                <li>Upload clear images of one or more Egyptian National ID cards</li>
                 <li>Click "Extract Data" to process the image</li>
                 <li>View the extracted information and annotated image</li>
             </ol>
@@ -215,70 +293,38 @@ def run_app():
     """, unsafe_allow_html=True)
     
     # File uploader
-    uploaded_file = st.file_uploader(
-        "Choose an ID Card Image",
+    uploaded_files = st.file_uploader(
+        "Choose ID Card Images",
         type=['jpg', 'jpeg', 'png'],
-        help="Upload a clear photo of the Egyptian National ID card"
+        accept_multiple_files=True,
+        help="Upload clear photos of Egyptian National ID cards"
     )
     
-    if uploaded_file is not None:
-        # Display uploaded image
-        st.markdown("### 📤 Uploaded Image")
+    if uploaded_files:
+        # Display uploaded images
+        st.markdown("### 📤 Uploaded Images")
         st.image(
-            uploaded_file,
-            caption='Original Uploaded Image',
+            uploaded_files,
+            caption=[uploaded_file.name for uploaded_file in uploaded_files],
             use_container_width=True
         )
         
         # Extract button
         if st.button("🚀 Extract Data", type="primary"):
-            with st.spinner("🔄 Processing ID Card... Please wait..."):
-                # Initialize controller
-                controller = IDExtractionController()
+            with st.spinner("🔄 Processing ID Cards... Please wait..."):
+                # Get the shared controller; waits for the warmup if it is
+                # still loading the models
+                controller = load_controller()
                 
-                # Process the image
-                result = controller.process_uploaded_file(uploaded_file)
-                
-                # Display results
-                if result['success']:
-                    st.success("✅ Data Extracted Successfully!")
-                    
-                    # Create two columns for images
-                    st.markdown("### 🖼️ Processed Images")
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.markdown("**Cropped ID Card**")
-                        if result['cropped_card'] is not None:
-                            st.image(
-                                result['cropped_card'],
-                                caption='Detected and Cropped ID Card',
-                                use_container_width=True
-                            )
-                    
-                    with col2:
-                        st.markdown("**Detected Fields**")
-                        if result['annotated_card'] is not None:
-                            st.image(
-                                result['annotated_card'],
-                                caption='ID Card with Detected Bounding Boxes',
-                                use_container_width=True
-                            )
-                    
-                    # Display extracted data
-                    st.markdown("---")
-                    render_extracted_data(result['data'])
-                    
-                    # Download button for JSON
+                # Process all images in one batch
+                results = controller.process_uploaded_files(uploaded_files)
+            
+            # Display results
+            for index, (uploaded_file, result) in enumerate(zip(uploaded_files, results)):
+                if len(uploaded_files) > 1:
                     st.markdown("---")
-                    st.download_button(
-                        label="📥 Download Extracted Data (JSON)",
-                        data=str(result['data']),
-                        file_name="extracted_id_data.json",
-                        mime="application/json"
-                    )
-                else:
-                    st.error(f"❌ {result['error']}")
+                    st.markdown(f"## 🪪 {uploaded_file.name}")
+                render_result(result, index)
     
     # Footer
     st.markdown("---")